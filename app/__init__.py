@@ -1,25 +1,47 @@
+import click
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
-from .config import Config
+from .config import config
+from .ratelimit import RateLimiter, LoadShedder
+from .serialization import FastJSONProvider, Compressor
+from .replicas import RoutingSession, ReplicaRouter
+from .jobs import JobQueue
 import logging
 
 
-db = SQLAlchemy()
-migrate = Migrate()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+limiter = RateLimiter()
+shedder = LoadShedder()
+compressor = Compressor()
+replicas = ReplicaRouter()
+jobs = JobQueue()
 
 
-def create_app():
+def create_app(config_name='default'):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config[config_name])
     app.debug = True  
+    app.json = FastJSONProvider(app)
+    app.json.compact = app.config['JSON_COMPACT']
 
+    replicas.init_app(app)
     db.init_app(app)
-    migrate.init_app(app, db)
+    # Flask-Migrate pulls in Alembic, which only the `flask db` CLI needs
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    limiter.init_app(app)
+    shedder.init_app(app, db)
+    compressor.init_app(app)
+    jobs.init_app(app)
 
     from .routes import api
+    from . import notifications  # registers job handlers
     app.register_blueprint(api, url_prefix='/api')
 
+    from .archive import archive_tasks_command
+    app.cli.add_command(archive_tasks_command)
+
     return app
 
 
@@ -28,5 +50,3 @@ logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
 )
-
-
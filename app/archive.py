@@ -0,0 +1,83 @@
+import datetime
+import time
+import logging
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, insert, literal, or_, select, union_all
+from sqlalchemy.exc import SQLAlchemyError
+from . import db
+from .models import Task, TaskDependency, ArchivedTask, ArchivedTaskDependency
+
+
+def archive_completed_tasks(cutoff, batch_size=500, pause=0.0):
+    """Move tasks completed before cutoff, and every dependency edge touching
+    them, into the archive tables.
+
+    Work is done in chunks of batch_size tasks, each in its own short
+    transaction, so the hot tables are never locked for long. Returns the
+    number of tasks archived.
+    """
+    archivable = (Task.status == 'Completed', Task.completed_at < cutoff)
+    archived = 0
+    while True:
+        # Row locks (PostgreSQL) keep update_tasks from reopening the chunk
+        # mid-move; the status/cutoff filter is repeated below for databases
+        # without them
+        ids = [row.id for row in db.session.query(Task.id).filter(*archivable)
+               .order_by(Task.id).limit(batch_size).with_for_update(skip_locked=True)]
+        if not ids:
+            break
+        try:
+            db.session.execute(insert(ArchivedTask).from_select(
+                ['id', 'title', 'description', 'status', 'project_id', 'assigned_to', 'completed_at', 'archived_at'],
+                select(Task.id, Task.title, Task.description, Task.status, Task.project_id,
+                       Task.assigned_to, Task.completed_at, literal(datetime.datetime.utcnow()))
+                .where(Task.id.in_(ids), *archivable)
+            ))
+            moved = [row.id for row in db.session.query(ArchivedTask.id).filter(ArchivedTask.id.in_(ids))]
+            edges = or_(TaskDependency.dependent_task_id.in_(moved), TaskDependency.depends_on_id.in_(moved))
+            db.session.execute(insert(ArchivedTaskDependency).from_select(
+                ['dependent_task_id', 'depends_on_id'],
+                select(TaskDependency.dependent_task_id, TaskDependency.depends_on_id).where(edges)
+            ))
+            db.session.execute(delete(TaskDependency).where(edges))
+            db.session.execute(delete(Task).where(Task.id.in_(moved), *archivable))
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            logging.error("Database error occurred while archiving tasks", exc_info=True)
+            raise
+        archived += len(moved)
+        logging.info("archive: moved %d tasks (%d total)", len(moved), archived)
+        if len(ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return archived
+
+
+def tasks_with_archived(**filters):
+    """Query id/title/description of live and archived tasks matching filters, ordered by id."""
+    tasks = union_all(
+        select(Task.id, Task.title, Task.description).filter_by(**filters),
+        select(ArchivedTask.id, ArchivedTask.title, ArchivedTask.description).filter_by(**filters)
+    ).subquery()
+    return db.session.query(tasks.c.id, tasks.c.title, tasks.c.description).order_by(tasks.c.id)
+
+
+@click.command('archive-tasks')
+@click.option('--older-than-days', type=int, default=None, help='Archive tasks completed more than this many days ago.')
+@click.option('--batch-size', type=int, default=None, help='Tasks moved per transaction.')
+@with_appcontext
+def archive_tasks_command(older_than_days, batch_size):
+    """Move old completed tasks into the archive tables."""
+    config = current_app.config
+    days = older_than_days if older_than_days is not None else config['ARCHIVE_AFTER_DAYS']
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=days)
+    archived = archive_completed_tasks(
+        cutoff,
+        batch_size=batch_size or config['ARCHIVE_BATCH_SIZE'],
+        pause=config['ARCHIVE_BATCH_PAUSE']
+    )
+    click.echo('Archived %d tasks completed before %s' % (archived, cutoff.isoformat()))
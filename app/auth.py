@@ -1,11 +1,13 @@
-import jwt
 import datetime
 from flask import current_app
 from functools import wraps
 from flask import request, jsonify
+from . import limiter
 
 
+# jwt (and the crypto backends it probes for) is imported on first use to keep worker start-up fast
 def generate_token(user_id):
+    import jwt
     payload = {
         'user_id': user_id,
         'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=1)
@@ -13,6 +15,7 @@ def generate_token(user_id):
     return jwt.encode(payload, current_app.config['SECRET_KEY'], algorithm='HS256')
 
 def decode_token(token):
+    import jwt
     try:
         payload = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
         return payload['user_id']
@@ -35,5 +38,9 @@ def token_required(f):
         if not user_id:
             return jsonify({'error': 'Token is invalid or expired!'}), 401
 
+        retry_after = limiter.check(user_id, request.endpoint)
+        if retry_after is not None:
+            return jsonify({'error': 'Rate limit exceeded'}), 429, {'Retry-After': str(retry_after)}
+
         return f(user_id, *args, **kwargs)
     return decorated
\ No newline at end of file
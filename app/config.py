@@ -7,4 +7,70 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('SQLALCHEMY_DATABASE_URI')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev')
-    
\ No newline at end of file
+
+    # Token-bucket rate limiting (rate is tokens per second, burst is bucket size)
+    RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', '1') == '1'
+    RATELIMIT_BACKEND = os.getenv('RATELIMIT_BACKEND', 'memory')  # 'memory' or 'sqlite'
+    RATELIMIT_SQLITE_PATH = os.getenv('RATELIMIT_SQLITE_PATH', 'ratelimit.db')
+    RATELIMIT_USER_RATE = float(os.getenv('RATELIMIT_USER_RATE', '20'))
+    RATELIMIT_USER_BURST = int(os.getenv('RATELIMIT_USER_BURST', '40'))
+    # Per-route overrides keyed by endpoint name: {'api.list_users': (rate, burst)}
+    RATELIMIT_ROUTE_LIMITS = {}
+
+    # Load shedding
+    MAX_CONCURRENT_REQUESTS = int(os.getenv('MAX_CONCURRENT_REQUESTS', '64'))
+    POOL_WAIT_THRESHOLD_MS = float(os.getenv('POOL_WAIT_THRESHOLD_MS', '500'))
+    SHED_RETRY_AFTER = int(os.getenv('SHED_RETRY_AFTER', '2'))
+
+    # Bulk user provisioning and lookup
+    BULK_INSERT_BATCH_SIZE = int(os.getenv('BULK_INSERT_BATCH_SIZE', '500'))
+    BULK_HASH_WORKERS = int(os.getenv('BULK_HASH_WORKERS', str(os.cpu_count() or 1)))
+    BULK_HASH_PARALLEL_MIN = int(os.getenv('BULK_HASH_PARALLEL_MIN', '16'))
+    BULK_MAX_USERS = int(os.getenv('BULK_MAX_USERS', '10000'))
+    BULK_LOOKUP_MAX_IDS = int(os.getenv('BULK_LOOKUP_MAX_IDS', '1000'))
+
+    # Response serialization and compression
+    JSON_COMPACT = os.getenv('JSON_COMPACT', '1') == '1'
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', '1') == '1'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+    COMPRESS_MIMETYPES = ('application/json', 'application/msgpack')
+    COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', '6'))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', '4'))
+
+    # Read replicas: comma-separated URIs; GET requests read from a replica whose
+    # lag is within REPLICA_MAX_LAG seconds, otherwise from the primary
+    SQLALCHEMY_REPLICA_URIS = [uri for uri in os.getenv('SQLALCHEMY_REPLICA_URIS', '').split(',') if uri]
+    REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', '5'))
+    REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', '1'))
+
+    # Archival of completed tasks (flask archive-tasks)
+    ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '90'))
+    ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '500'))
+    ARCHIVE_BATCH_PAUSE = float(os.getenv('ARCHIVE_BATCH_PAUSE', '0.1'))
+
+    # Background job queue for post-commit work
+    JOBS_BACKEND = os.getenv('JOBS_BACKEND', 'memory')  # 'memory' or 'sqlite'
+    JOBS_SQLITE_PATH = os.getenv('JOBS_SQLITE_PATH', 'jobs.db')
+    JOBS_WORKERS = int(os.getenv('JOBS_WORKERS', '2'))
+    JOBS_BATCH_SIZE = int(os.getenv('JOBS_BATCH_SIZE', '50'))
+    JOBS_MAX_RETRIES = int(os.getenv('JOBS_MAX_RETRIES', '3'))
+    JOBS_RETRY_BACKOFF = float(os.getenv('JOBS_RETRY_BACKOFF', '1'))
+    JOBS_POLL_INTERVAL = float(os.getenv('JOBS_POLL_INTERVAL', '0.5'))
+    JOBS_VISIBILITY_TIMEOUT = int(os.getenv('JOBS_VISIBILITY_TIMEOUT', '300'))
+    JOBS_EAGER = False
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_REPLICA_URIS = []
+    RATELIMIT_ENABLED = False
+    BULK_HASH_WORKERS = 1
+    ARCHIVE_BATCH_PAUSE = 0
+    JOBS_EAGER = True
+
+
+config = {
+    'default': Config,
+    'testing': TestingConfig,
+}
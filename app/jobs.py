@@ -0,0 +1,272 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from flask import current_app
+from .metrics import Counters
+
+
+class MemoryBackend:
+    """Jobs held in process memory; lost if the worker process exits."""
+
+    def __init__(self):
+        self._jobs = []
+        self._next_id = 1
+        self._lock = threading.Condition()
+
+    def push(self, job_type, payload, run_at=None):
+        with self._lock:
+            now = time.time()
+            self._jobs.append({
+                'id': self._next_id, 'type': job_type, 'payload': payload,
+                'attempts': 0, 'run_at': run_at or now, 'enqueued_at': now
+            })
+            self._next_id += 1
+            self._lock.notify()
+
+    def claim(self, batch_size, timeout):
+        """Remove and return up to batch_size ready jobs of the same type."""
+        with self._lock:
+            ready = self._ready()
+            if not ready:
+                self._lock.wait(timeout)
+                ready = self._ready()
+            if not ready:
+                return []
+            job_type = ready[0]['type']
+            batch = [job for job in ready if job['type'] == job_type][:batch_size]
+            for job in batch:
+                self._jobs.remove(job)
+            return batch
+
+    def _ready(self):
+        now = time.time()
+        return [job for job in self._jobs if job['run_at'] <= now]
+
+    def ack(self, jobs):
+        pass
+
+    def retry(self, job, delay):
+        with self._lock:
+            self._jobs.append(dict(job, attempts=job['attempts'] + 1, run_at=time.time() + delay))
+
+    def depth(self):
+        with self._lock:
+            return len(self._jobs)
+
+
+class SQLiteBackend:
+    """Jobs stored in a SQLite file so they survive restarts and are shared by
+    every worker process on the host.
+
+    Claimed jobs that are not acknowledged within visibility_timeout seconds
+    (e.g. because the worker died) become claimable again.
+    """
+
+    def __init__(self, path, visibility_timeout=300):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self._local = threading.local()
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS job ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, type TEXT NOT NULL, payload TEXT NOT NULL, '
+            'attempts INTEGER NOT NULL DEFAULT 0, run_at REAL NOT NULL, enqueued_at REAL NOT NULL, '
+            'claimed_at REAL)'
+        )
+
+    def _connect(self):
+        # A connection inherited from a pre-fork parent must not be reused
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def push(self, job_type, payload, run_at=None):
+        now = time.time()
+        self._connect().execute(
+            'INSERT INTO job (type, payload, run_at, enqueued_at) VALUES (?, ?, ?, ?)',
+            (job_type, json.dumps(payload), run_at or now, now)
+        )
+
+    def claim(self, batch_size, timeout):
+        conn = self._connect()
+        now = time.time()
+        ready = '(claimed_at IS NULL OR claimed_at < ?) AND run_at <= ?'
+        params = (now - self.visibility_timeout, now)
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            first = conn.execute('SELECT type FROM job WHERE %s ORDER BY id LIMIT 1' % ready, params).fetchone()
+            rows = []
+            if first:
+                rows = conn.execute(
+                    'SELECT * FROM job WHERE type = ? AND %s ORDER BY id LIMIT ?' % ready,
+                    (first['type'],) + params + (batch_size,)
+                ).fetchall()
+                conn.executemany('UPDATE job SET claimed_at = ? WHERE id = ?', [(now, row['id']) for row in rows])
+            conn.execute('COMMIT')
+        except sqlite3.Error:
+            conn.execute('ROLLBACK')
+            raise
+        if not rows:
+            time.sleep(timeout)
+        return [dict(row, payload=json.loads(row['payload'])) for row in rows]
+
+    def ack(self, jobs):
+        self._connect().executemany('DELETE FROM job WHERE id = ?', [(job['id'],) for job in jobs])
+
+    def retry(self, job, delay):
+        self._connect().execute(
+            'UPDATE job SET attempts = attempts + 1, run_at = ?, claimed_at = NULL WHERE id = ?',
+            (time.time() + delay, job['id'])
+        )
+
+    def depth(self):
+        return self._connect().execute('SELECT COUNT(*) FROM job').fetchone()[0]
+
+
+class _JobState:
+    def __init__(self, app, backend):
+        self.app = app
+        self.backend = backend
+        self.workers = []
+        self.pid = None
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.counters = Counters(
+            enqueued=0, processed=0, failed=0, retried=0, dead=0, batches=0,
+            last_latency_ms=0.0, max_latency_ms=0.0
+        )
+
+
+class JobQueue:
+    """In-process job queue for follow-up work that should not delay a request.
+
+    Routes call enqueue() after committing. Worker threads claim up to
+    JOBS_BATCH_SIZE ready jobs of the same type and pass their payloads to the
+    handler registered for that type in one call. A failed batch is retried
+    with exponential backoff up to JOBS_MAX_RETRIES times.
+    """
+
+    def __init__(self):
+        self.handlers = {}
+
+    def handler(self, job_type):
+        def decorator(f):
+            self.handlers[job_type] = f
+            return f
+        return decorator
+
+    def init_app(self, app):
+        if app.config.get('JOBS_BACKEND', 'memory') == 'sqlite':
+            backend = SQLiteBackend(app.config['JOBS_SQLITE_PATH'], app.config.get('JOBS_VISIBILITY_TIMEOUT', 300))
+        else:
+            backend = MemoryBackend()
+        app.extensions['jobs'] = _JobState(app, backend)
+        app.before_request(self._before_request)
+
+    def _before_request(self):
+        # Jobs left in a persistent queue by a previous process must not wait
+        # for this process to enqueue something before they run. Starting on
+        # the first request keeps pollers out of CLI commands and out of a
+        # pre-fork server's master process.
+        state = current_app.extensions['jobs']
+        if isinstance(state.backend, SQLiteBackend) and not current_app.config.get('JOBS_EAGER'):
+            self._start_workers(state)
+
+    def enqueue(self, job_type, payload):
+        state = current_app.extensions['jobs']
+        state.counters.incr('enqueued')
+        if current_app.config.get('JOBS_EAGER'):
+            self._run(state, [{'id': None, 'type': job_type, 'payload': payload, 'attempts': 0,
+                               'enqueued_at': time.time()}], retry=False)
+            return
+        state.backend.push(job_type, payload)
+        self._start_workers(state)
+
+    def _start_workers(self, state):
+        # Threads do not survive a fork, so a forked worker process starts its own
+        pid = os.getpid()
+        if state.pid == pid:
+            return
+        with state.lock:
+            if state.pid == pid:
+                return
+            state.workers = []
+            for i in range(state.app.config.get('JOBS_WORKERS', 2)):
+                worker = threading.Thread(target=self._work, args=(state,), name='job-worker-%d' % i, daemon=True)
+                worker.start()
+                state.workers.append(worker)
+            state.pid = pid
+
+    def _work(self, state):
+        config = state.app.config
+        while not state.stopping.is_set():
+            try:
+                jobs = state.backend.claim(config.get('JOBS_BATCH_SIZE', 50), config.get('JOBS_POLL_INTERVAL', 0.5))
+                if jobs:
+                    with state.app.app_context():
+                        self._run(state, jobs, retry=True)
+            except Exception:
+                logging.error("job worker error", exc_info=True)
+
+    def _run(self, state, jobs, retry):
+        job_type = jobs[0]['type']
+        start = time.time()
+        try:
+            handler = self.handlers[job_type]
+            handler([job['payload'] for job in jobs])
+        except Exception:
+            state.counters.incr('failed', len(jobs))
+            logging.error("job batch %s failed (%d jobs)", job_type, len(jobs), exc_info=True)
+            config = state.app.config
+            for job in jobs:
+                if retry and job['attempts'] < config.get('JOBS_MAX_RETRIES', 3):
+                    state.counters.incr('retried')
+                    state.backend.retry(job, config.get('JOBS_RETRY_BACKOFF', 1.0) * 2 ** job['attempts'])
+                    continue
+                state.counters.incr('dead')
+                logging.error("job %s %s dropped after %d attempts", job_type, job['payload'], job['attempts'] + 1)
+                if retry:
+                    state.backend.ack([job])
+            return
+        if retry:
+            state.backend.ack(jobs)
+        now = time.time()
+        latency = max(now - job['enqueued_at'] for job in jobs) * 1000
+        state.counters.incr('processed', len(jobs))
+        state.counters.incr('batches')
+        state.counters.set('last_latency_ms', round(latency, 3))
+        if latency > state.counters.get('max_latency_ms'):
+            state.counters.set('max_latency_ms', round(latency, 3))
+        logging.info("job batch %s processed %d jobs in %.1f ms", job_type, len(jobs), (now - start) * 1000)
+
+    def wait_idle(self, timeout=5.0, app=None):
+        """Block until every job enqueued by this process has been processed or dropped.
+
+        Returns False on timeout.
+        """
+        counters = (app or current_app).extensions['jobs'].counters
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if counters.get('enqueued') == counters.get('processed') + counters.get('dead'):
+                return True
+            time.sleep(0.01)
+        return False
+
+    def shutdown(self, app=None):
+        state = (app or current_app).extensions['jobs']
+        state.stopping.set()
+        for worker in state.workers:
+            worker.join()
+
+    def stats(self):
+        state = current_app.extensions['jobs']
+        stats = state.counters.snapshot()
+        stats['depth'] = state.backend.depth()
+        stats['workers'] = len(state.workers)
+        return stats
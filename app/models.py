@@ -1,5 +1,6 @@
+import threading
 from . import db
-from werkzeug.security import *
+from werkzeug.security import generate_password_hash, check_password_hash
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -13,20 +14,84 @@ class User(db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+def make_hash_pool(workers):
+    """Create the long-lived process pool used by hash_passwords.
+
+    Workers are started with forkserver (spawn where unavailable) rather than
+    by forking the multi-threaded server process, and only on first use.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+
+_hash_pool_lock = threading.Lock()
+
+def get_hash_pool(app):
+    """Return app's password hashing pool, creating it on first use.
+
+    Returns None when BULK_HASH_WORKERS is 1 or less. Creating the pool lazily
+    keeps multiprocessing out of start-up.
+    """
+    workers = app.config['BULK_HASH_WORKERS']
+    if workers <= 1:
+        return None
+    pool = app.extensions.get('password_hash_pool')
+    if pool is None:
+        with _hash_pool_lock:
+            pool = app.extensions.get('password_hash_pool')
+            if pool is None:
+                pool = app.extensions['password_hash_pool'] = make_hash_pool(workers)
+    return pool
+
+def hash_passwords(passwords, pool=None, workers=1, parallel_min=16):
+    """Hash many passwords the same way as User.set_password.
+
+    Hashing is CPU bound, so large batches are spread over pool; small
+    batches, or calls without a pool, are hashed inline.
+    """
+    passwords = list(passwords)
+    if pool is None or len(passwords) < parallel_min:
+        return [generate_password_hash(password) for password in passwords]
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(pool.map(generate_password_hash, passwords, chunksize=chunksize))
+
 class Project(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(80), nullable=False)
     
 class Task(db.Model):
+    # Never reuse ids of archived (deleted) tasks on SQLite
+    __table_args__ = {'sqlite_autoincrement': True}
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(80), nullable=False)
     description = db.Column(db.Text, nullable=False)
     status = db.Column(db.String(80), default='Pending', nullable=False)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
     assigned_to = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    completed_at = db.Column(db.DateTime, nullable=True, index=True)
     dependencies = db.relationship('TaskDependency', foreign_keys='TaskDependency.dependent_task_id', backref='task', cascade='all, delete-orphan')
 
 class TaskDependency(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     dependent_task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False)
-    depends_on_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False)
\ No newline at end of file
+    depends_on_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False)
+
+class ArchivedTask(db.Model):
+    """Completed task moved out of the hot task table by app.archive."""
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    title = db.Column(db.String(80), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(80), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False, index=True)
+    assigned_to = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+class ArchivedTaskDependency(db.Model):
+    # No foreign keys: either end may live in task or archived_task. The id is
+    # the archive's own, since SQLite may reuse task_dependency ids.
+    id = db.Column(db.Integer, primary_key=True)
+    dependent_task_id = db.Column(db.Integer, nullable=False, index=True)
+    depends_on_id = db.Column(db.Integer, nullable=False, index=True)
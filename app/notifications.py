@@ -0,0 +1,33 @@
+import logging
+from sqlalchemy import exists
+from sqlalchemy.orm import aliased
+from . import db, jobs
+from .models import Task, TaskDependency
+
+
+@jobs.handler('task_assigned')
+def notify_assigned(payloads):
+    for payload in payloads:
+        logging.info("notify user %s: task %s assigned", payload['assigned_to'], payload['task_id'])
+
+
+@jobs.handler('task_completed')
+def notify_unblocked(payloads):
+    """Notify assignees of tasks whose last incomplete dependency was just completed."""
+    completed_ids = {payload['task_id'] for payload in payloads}
+    dependency = aliased(Task)
+    still_blocked = exists().where(
+        TaskDependency.dependent_task_id == Task.id,
+        TaskDependency.depends_on_id == dependency.id,
+        dependency.status != 'Completed'
+    )
+    dependents = db.session.query(TaskDependency.dependent_task_id).filter(
+        TaskDependency.depends_on_id.in_(completed_ids)
+    )
+    unblocked = Task.query.filter(
+        Task.id.in_(dependents),
+        Task.status != 'Completed',
+        ~still_blocked
+    ).all()
+    for task in unblocked:
+        logging.info("notify user %s: task %s is unblocked", task.assigned_to, task.id)
@@ -0,0 +1,206 @@
+import math
+import sqlite3
+import threading
+import time
+import logging
+from flask import current_app, g, has_request_context, jsonify
+from sqlalchemy import event
+from .metrics import Counters
+
+
+class MemoryBackend:
+    """Token buckets held in process memory. Only correct for a single worker."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, rate, burst):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+
+class SQLiteBackend:
+    """Token buckets in a SQLite file shared by every worker on the host.
+
+    Each consume runs in a BEGIN IMMEDIATE transaction so concurrent workers
+    serialise on the bucket update instead of double-spending tokens.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS rate_limit_bucket ('
+            'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def consume(self, key, rate, burst):
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT tokens, updated FROM rate_limit_bucket WHERE key = ?', (key,)
+            ).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_limit_bucket (key, tokens, updated) VALUES (?, ?, ?)',
+                (key, tokens, now)
+            )
+            conn.execute('COMMIT')
+        except sqlite3.Error:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+
+class _RateLimitState:
+    def __init__(self, backend):
+        self.backend = backend
+        self.counters = Counters(allowed=0, limited=0, backend_errors=0)
+
+
+class RateLimiter:
+    """Per-user and per-route token-bucket admission control.
+
+    Every authenticated user gets a bucket of RATELIMIT_USER_BURST tokens refilled
+    at RATELIMIT_USER_RATE tokens per second. Endpoints listed in
+    RATELIMIT_ROUTE_LIMITS get an additional (rate, burst) bucket per user.
+    If the backend fails (e.g. the SQLite file stays locked past its timeout)
+    the request is let through and counted in backend_errors.
+    """
+
+    def init_app(self, app):
+        if app.config.get('RATELIMIT_BACKEND', 'memory') == 'sqlite':
+            backend = SQLiteBackend(app.config['RATELIMIT_SQLITE_PATH'])
+        else:
+            backend = MemoryBackend()
+        app.extensions['ratelimit'] = _RateLimitState(backend)
+
+    def check(self, user_id, endpoint):
+        """Consume a token for this request; return the Retry-After seconds if limited, else None."""
+        config = current_app.config
+        if not config.get('RATELIMIT_ENABLED', True):
+            return None
+        state = current_app.extensions['ratelimit']
+        limits = []
+        route_limit = config.get('RATELIMIT_ROUTE_LIMITS', {}).get(endpoint)
+        if route_limit:
+            limits.append(('route:%s:user:%s' % (endpoint, user_id),) + tuple(route_limit))
+        limits.append(('user:%s' % user_id, config['RATELIMIT_USER_RATE'], config['RATELIMIT_USER_BURST']))
+        for key, rate, burst in limits:
+            try:
+                allowed, retry_after = state.backend.consume(key, rate, burst)
+            except sqlite3.Error:
+                state.counters.incr('backend_errors')
+                logging.error("rate limit backend failed for %s, allowing request", key, exc_info=True)
+                return None
+            if not allowed:
+                state.counters.incr('limited')
+                logging.warning("rate limit exceeded for %s", key)
+                return max(1, math.ceil(retry_after))
+        state.counters.incr('allowed')
+        return None
+
+    def stats(self):
+        return current_app.extensions['ratelimit'].counters.snapshot()
+
+
+class _ShedState:
+    def __init__(self, max_concurrent, pool_wait_threshold, retry_after):
+        self.max_concurrent = max_concurrent
+        self.pool_wait_threshold = pool_wait_threshold
+        self.retry_after = retry_after
+        self.overloaded_until = 0.0
+        self.counters = Counters(
+            in_flight=0, shed_concurrency=0, shed_pool_wait=0,
+            last_pool_wait_ms=0.0, max_pool_wait_ms=0.0
+        )
+
+
+class LoadShedder:
+    """Global concurrency cap that answers 503 + Retry-After when the app is saturated.
+
+    A request is shed when MAX_CONCURRENT_REQUESTS are already in flight. Pool
+    wait is measured on the first connection checkout a request actually makes,
+    so requests rejected before touching the database (401, 429, /api/metrics)
+    never take a connection. A checkout slower than POOL_WAIT_THRESHOLD_MS sheds
+    new requests for SHED_RETRY_AFTER seconds so the pool can drain.
+    """
+
+    _listening = False
+
+    def init_app(self, app, db):
+        app.extensions['load_shedder'] = _ShedState(
+            app.config.get('MAX_CONCURRENT_REQUESTS', 64),
+            app.config.get('POOL_WAIT_THRESHOLD_MS', 500) / 1000.0,
+            app.config.get('SHED_RETRY_AFTER', 2)
+        )
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        if not LoadShedder._listening:
+            # do_orm_execute runs before the session checks out a connection,
+            # after_begin once it has one
+            event.listen(db.session, 'do_orm_execute', self._before_execute)
+            event.listen(db.session, 'after_begin', self._after_begin)
+            LoadShedder._listening = True
+
+    def _shed(self, state, reason):
+        state.counters.incr(reason)
+        logging.warning("load shedding: %s", reason)
+        return jsonify({'error': 'Service overloaded, retry later'}), 503, {'Retry-After': str(state.retry_after)}
+
+    def _before_request(self):
+        state = current_app.extensions['load_shedder']
+        if state.counters.incr('in_flight') > state.max_concurrent:
+            state.counters.incr('in_flight', -1)
+            return self._shed(state, 'shed_concurrency')
+        g._load_shedder_admitted = True
+        if time.monotonic() < state.overloaded_until:
+            return self._shed(state, 'shed_pool_wait')
+        return None
+
+    def _before_execute(self, orm_execute_state):
+        if has_request_context() and '_pool_wait_start' not in g:
+            g._pool_wait_start = time.monotonic()
+
+    def _after_begin(self, session, transaction, connection):
+        if not has_request_context() or g.get('_pool_wait_measured') or '_pool_wait_start' not in g:
+            return
+        g._pool_wait_measured = True
+        state = current_app.extensions.get('load_shedder')
+        if state is None:
+            return
+        wait = time.monotonic() - g._pool_wait_start
+        state.counters.set('last_pool_wait_ms', round(wait * 1000, 3))
+        if wait * 1000 > state.counters.get('max_pool_wait_ms'):
+            state.counters.set('max_pool_wait_ms', round(wait * 1000, 3))
+        if wait > state.pool_wait_threshold:
+            state.overloaded_until = time.monotonic() + state.retry_after
+            logging.warning("load shedding: pool checkout took %.1f ms", wait * 1000)
+
+    def _teardown_request(self, exc):
+        if g.pop('_load_shedder_admitted', False):
+            current_app.extensions['load_shedder'].counters.incr('in_flight', -1)
+
+    def stats(self):
+        return current_app.extensions['load_shedder'].counters.snapshot()
@@ -0,0 +1,125 @@
+import itertools
+import threading
+import time
+import logging
+import sqlalchemy as sa
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from .metrics import Counters
+
+
+READ_ONLY_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# The replay timestamp stops advancing while the primary is idle, so a replica
+# that has replayed everything it received counts as zero lag
+REPLICA_LAG_SQL = sa.text(
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+)
+
+
+class RoutingSession(Session):
+    """Session that sends the reads of read-only requests to a replica.
+
+    Flushes and UPDATE/DELETE/INSERT statements always use the primary, and once
+    a request has written anything its remaining reads stay on the primary too.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or not has_request_context():
+            return engine
+        state = current_app.extensions.get('replicas')
+        if state is None or not state.names or engine is not self._db.engines.get(None):
+            return engine
+        if self._flushing or isinstance(clause, sa.UpdateBase):
+            g._db_wrote = True
+            return engine
+        if not g.get('_db_read_only') or g.get('_db_wrote'):
+            return engine
+        if '_db_replica' not in g:
+            g._db_replica = state.choose()
+        if g._db_replica is None:
+            return engine
+        return state.engines[g._db_replica]
+
+
+class _ReplicaState:
+    def __init__(self, engines, max_lag, check_interval):
+        self.engines = engines
+        self.names = list(engines)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.reported_lag = {}
+        self._checked = {}
+        self._lock = threading.Lock()
+        self._cycle = itertools.cycle(self.names) if self.names else None
+        self.counters = Counters(replica_reads=0, primary_fallbacks=0)
+
+    def set_lag(self, name, seconds):
+        """Record the replication lag of a replica whose lag cannot be queried directly."""
+        with self._lock:
+            self.reported_lag[name] = seconds
+            self._checked.pop(name, None)
+
+    def lag(self, name):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._checked.get(name)
+            if cached and now - cached[0] < self.check_interval:
+                return cached[1]
+        lag = self._probe(name)
+        with self._lock:
+            self._checked[name] = (now, lag)
+        return lag
+
+    def _probe(self, name):
+        engine = self.engines[name]
+        if engine.dialect.name != 'postgresql':
+            return self.reported_lag.get(name, 0.0)
+        try:
+            with engine.connect() as conn:
+                lag = conn.execute(REPLICA_LAG_SQL).scalar()
+            return float(lag or 0.0)
+        except sa.exc.SQLAlchemyError:
+            logging.warning("replica %s lag probe failed", name, exc_info=True)
+            return float('inf')
+
+    def choose(self):
+        """Return the bind key of a replica within REPLICA_MAX_LAG, or None for the primary."""
+        with self._lock:
+            candidates = [next(self._cycle) for _ in self.names]
+        for name in candidates:
+            if self.lag(name) <= self.max_lag:
+                self.counters.incr('replica_reads')
+                return name
+        self.counters.incr('primary_fallbacks')
+        logging.warning("all replicas exceed max lag, reading from primary")
+        return None
+
+
+class ReplicaRouter:
+    """Creates an engine per SQLALCHEMY_REPLICA_URIS entry and marks read-only requests.
+
+    Replica engines are kept out of SQLALCHEMY_BINDS so db.create_all() and
+    migrations never touch them.
+    """
+
+    def init_app(self, app):
+        options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        engines = {
+            'replica_%d' % i: sa.create_engine(uri, **options)
+            for i, uri in enumerate(app.config.get('SQLALCHEMY_REPLICA_URIS') or [])
+        }
+        app.extensions['replicas'] = _ReplicaState(
+            engines,
+            app.config.get('REPLICA_MAX_LAG', 5.0),
+            app.config.get('REPLICA_LAG_CHECK_INTERVAL', 1.0)
+        )
+        app.before_request(self._before_request)
+
+    def _before_request(self):
+        g._db_read_only = request.method in READ_ONLY_METHODS
+
+    def stats(self):
+        return current_app.extensions['replicas'].counters.snapshot()
@@ -1,15 +1,31 @@
-from flask import *
-from .models import *
-from .auth import *
-from functools import *
-import re
+from flask import Blueprint, current_app, jsonify, request
+from .models import User, Project, Task, TaskDependency, ArchivedTask, hash_passwords, get_hash_pool
+from .auth import generate_token, token_required
 import re
 from werkzeug.exceptions import BadRequestKeyError
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from . import db, limiter, shedder, replicas, jobs
+from .serialization import render_response
+from .archive import tasks_with_archived
+import datetime
 import logging
 
 api = Blueprint('api', __name__)
 
+
+def is_id(value):
+    # JSON true/false decode to bool, which is a subclass of int
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def include_archived():
+    return request.args.get('include_archived') in ('1', 'true')
+
+
+OPEN_STATUSES = ['Pending', 'In Progress']
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
 # LOGIN
 @api.route('/auth/login', methods=['POST'])
 def login():
@@ -37,8 +53,7 @@ def create_users():
             logging.warning("create_users: missing required fields")
             return jsonify({'error': 'Missing required fields'}), 400
         
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_pattern, data['email']):
+        if not EMAIL_PATTERN.match(data['email']):
             logging.warning("create_users: invalid email format: %s", data['email'])
             return jsonify({'error': 'Invalid email format'}), 400
     except BadRequestKeyError:
@@ -61,6 +76,88 @@ def create_users():
         return jsonify({"error": "Database error"}), 500
 
 
+@api.route('/create_users/bulk', methods=['POST'])
+@token_required
+def create_users_bulk(user_id):
+    logging.info("create_users_bulk endpoint called by user_id %s", user_id)
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data.get('users'), list) or not data['users']:
+        logging.warning("create_users_bulk: missing users list")
+        return jsonify({'error': 'A non-empty users list is required'}), 400
+    if len(data['users']) > current_app.config['BULK_MAX_USERS']:
+        logging.warning("create_users_bulk: too many users: %d", len(data['users']))
+        return jsonify({'error': f"At most {current_app.config['BULK_MAX_USERS']} users per request"}), 400
+
+    errors = []
+    for index, item in enumerate(data['users']):
+        if not isinstance(item, dict) or not all(k in item for k in ('username', 'email', 'password')):
+            errors.append({'index': index, 'error': 'Missing required fields'})
+        elif not all(isinstance(item[k], str) for k in ('username', 'email', 'password')):
+            errors.append({'index': index, 'error': 'username, email and password must be strings'})
+        elif not EMAIL_PATTERN.match(item['email']):
+            errors.append({'index': index, 'error': 'Invalid email format'})
+    if errors:
+        logging.warning("create_users_bulk: %d invalid entries", len(errors))
+        return jsonify({'error': 'Invalid users', 'details': errors}), 400
+
+    # One IN query for every username and email instead of one lookup per user
+    usernames = {item['username'] for item in data['users']}
+    emails = {item['email'] for item in data['users']}
+    try:
+        existing = db.session.query(User.username, User.email).filter(
+            or_(User.username.in_(usernames), User.email.in_(emails))
+        ).all()
+    except SQLAlchemyError:
+        logging.error("Database error occurred in create_users_bulk", exc_info=True)
+        return jsonify({'error': 'Database error'}), 500
+    taken_usernames = {row.username for row in existing}
+    taken_emails = {row.email for row in existing}
+
+    pending, conflicts = [], []
+    for item in data['users']:
+        if item['username'] in taken_usernames or item['email'] in taken_emails:
+            conflicts.append(item['username'])
+            continue
+        taken_usernames.add(item['username'])
+        taken_emails.add(item['email'])
+        pending.append(item)
+
+    config = current_app.config
+    # The pool is only started by the first batch large enough to use it
+    hashes = hash_passwords(
+        [item['password'] for item in pending],
+        pool=get_hash_pool(current_app) if len(pending) >= config['BULK_HASH_PARALLEL_MIN'] else None,
+        workers=config['BULK_HASH_WORKERS'],
+        parallel_min=config['BULK_HASH_PARALLEL_MIN']
+    )
+    rows = [
+        {'username': item['username'], 'email': item['email'], 'password_hash': password_hash}
+        for item, password_hash in zip(pending, hashes)
+    ]
+
+    created = []
+    batch_size = config['BULK_INSERT_BATCH_SIZE']
+    try:
+        for start in range(0, len(rows), batch_size):
+            result = db.session.execute(
+                insert(User).returning(User.id, User.username),
+                rows[start:start + batch_size]
+            )
+            created.extend({'id': row.id, 'username': row.username} for row in result)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        logging.warning("create_users_bulk: concurrent insert conflict", exc_info=True)
+        return jsonify({'error': 'User already exists'}), 409
+    except SQLAlchemyError:
+        db.session.rollback()
+        logging.error("Database error occurred in create_users_bulk", exc_info=True)
+        return jsonify({'error': 'Database error'}), 500
+
+    logging.info("create_users_bulk: created %d users, skipped %d", len(created), len(conflicts))
+    return jsonify({'created': created, 'conflicts': conflicts}), 201
+
+
 @api.route('/list_users', methods=['GET'])
 @token_required
 def list_users(user_id):
@@ -71,7 +168,7 @@ def list_users(user_id):
         pagination = User.query.paginate(page=page, per_page=per_page, error_out=False)
         users = [{'id': user.id, 'username': user.username} for user in pagination.items]
         logging.info("list_users: returned %d users", len(users))
-        return jsonify({
+        return render_response({
             'users': users,
             'total': pagination.total,
             'page': pagination.page,
@@ -83,6 +180,32 @@ def list_users(user_id):
         return jsonify({'error': 'Database error'}), 500
 
 
+@api.route('/get_users', methods=['GET'])
+@token_required
+def get_users_batch(user_id):
+    logging.info("get_users_batch endpoint called by user_id %s", user_id)
+    try:
+        ids = {int(value) for value in request.args.get('ids', '').split(',') if value.strip()}
+    except ValueError:
+        logging.warning("get_users_batch: invalid ids: %s", request.args.get('ids'))
+        return jsonify({'error': 'ids must be a comma-separated list of integers'}), 400
+    if not ids:
+        return jsonify({'error': 'ids query parameter is required'}), 400
+    if len(ids) > current_app.config['BULK_LOOKUP_MAX_IDS']:
+        return jsonify({'error': f"At most {current_app.config['BULK_LOOKUP_MAX_IDS']} ids per request"}), 400
+    try:
+        users = User.query.filter(User.id.in_(ids)).order_by(User.id).all()
+    except SQLAlchemyError:
+        logging.error("Database error occurred in get_users_batch", exc_info=True)
+        return jsonify({'error': 'Database error'}), 500
+    found = {user.id for user in users}
+    logging.info("get_users_batch: returned %d users", len(users))
+    return render_response({
+        'users': [{'id': user.id, 'username': user.username} for user in users],
+        'missing': sorted(ids - found)
+    }), 200
+
+
 @api.route('/get_users/<int:target_user_id>', methods=['GET'])
 @token_required
 def get_users(user_id, target_user_id):
@@ -102,11 +225,10 @@ def delete_users(auth_user_id, user_id):
     if not user:
         logging.warning("delete_users: user not found: %s", user_id)
         return jsonify({'error': 'User not found'}), 404
-    tasks = Task.query.filter(
-        Task.assigned_to == user.id,
-        Task.status.in_(['Pending', 'In Progress'])
-    ).all()
-    if tasks:
+    has_open_tasks = db.session.query(
+        Task.query.filter(Task.assigned_to == user.id, Task.status.in_(OPEN_STATUSES)).exists()
+    ).scalar()
+    if has_open_tasks:
         logging.warning("delete_users: user %s has pending/in-progress tasks", user_id)
         return jsonify({'error': 'Cannot delete user with assigned pending or in-progress tasks'}), 409
     try:
@@ -120,6 +242,89 @@ def delete_users(auth_user_id, user_id):
         return jsonify({'error': 'Database error'}), 500
 
 
+@api.route('/reassign_tasks', methods=['POST'])
+@token_required
+def reassign_tasks(user_id):
+    logging.info("reassign_tasks endpoint called by user_id %s", user_id)
+    data = request.get_json(silent=True)
+    if not data or not all(is_id(data.get(k)) for k in ('from_user_id', 'to_user_id')):
+        logging.warning("reassign_tasks: missing required fields")
+        return jsonify({'error': 'from_user_id and to_user_id are required'}), 400
+    from_user_id, to_user_id = data['from_user_id'], data['to_user_id']
+    if from_user_id == to_user_id:
+        return jsonify({'error': 'Cannot reassign tasks to the same user'}), 400
+    try:
+        found = {row.id for row in db.session.query(User.id).filter(User.id.in_([from_user_id, to_user_id]))}
+        if found != {from_user_id, to_user_id}:
+            logging.warning("reassign_tasks: user not found: %s", {from_user_id, to_user_id} - found)
+            return jsonify({'error': 'User not found'}), 404
+        reassigned = Task.query.filter(
+            Task.assigned_to == from_user_id,
+            Task.status.in_(OPEN_STATUSES)
+        ).update({Task.assigned_to: to_user_id}, synchronize_session=False)
+        db.session.commit()
+        logging.info("reassign_tasks: moved %d tasks from user %s to user %s", reassigned, from_user_id, to_user_id)
+        return jsonify({'message': 'Tasks reassigned successfully', 'reassigned': reassigned}), 200
+    except SQLAlchemyError:
+        db.session.rollback()
+        logging.error("Database error occurred in reassign_tasks", exc_info=True)
+        return jsonify({'error': 'Database error'}), 500
+
+
+@api.route('/delete_users/bulk', methods=['POST'])
+@token_required
+def delete_users_bulk(auth_user_id):
+    logging.info("delete_users_bulk endpoint called by user_id %s", auth_user_id)
+    data = request.get_json(silent=True)
+    user_ids = data.get('user_ids') if data else None
+    reassign_to = data.get('reassign_to') if data else None
+    if not isinstance(user_ids, list) or not user_ids or not all(is_id(i) for i in user_ids):
+        logging.warning("delete_users_bulk: missing user_ids")
+        return jsonify({'error': 'A non-empty list of integer user_ids is required'}), 400
+    if reassign_to is not None and (not is_id(reassign_to) or reassign_to in user_ids):
+        return jsonify({'error': 'reassign_to must be a user id not being deleted'}), 400
+    user_ids = set(user_ids)
+    try:
+        lookup_ids = user_ids | ({reassign_to} if reassign_to is not None else set())
+        found = {row.id for row in db.session.query(User.id).filter(User.id.in_(lookup_ids))}
+        if reassign_to is not None and reassign_to not in found:
+            logging.warning("delete_users_bulk: reassign target not found: %s", reassign_to)
+            return jsonify({'error': 'Reassign target user not found'}), 404
+        candidates = found & user_ids
+
+        reassigned = 0
+        if reassign_to is not None and candidates:
+            reassigned = Task.query.filter(
+                Task.assigned_to.in_(candidates),
+                Task.status.in_(OPEN_STATUSES)
+            ).update({Task.assigned_to: reassign_to}, synchronize_session=False)
+
+        # One EXISTS-based query finds every candidate still referenced by a live or
+        # archived task; deleting those would violate the assigned_to foreign keys
+        task_exists = db.session.query(Task.id).filter(Task.assigned_to == User.id).exists()
+        archived_task_exists = db.session.query(ArchivedTask.id).filter(ArchivedTask.assigned_to == User.id).exists()
+        blocked = {row.id for row in db.session.query(User.id).filter(
+            User.id.in_(candidates),
+            or_(task_exists, archived_task_exists)
+        )}
+        eligible = candidates - blocked
+        if eligible:
+            User.query.filter(User.id.in_(eligible)).delete(synchronize_session=False)
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        logging.error("Database error occurred in delete_users_bulk", exc_info=True)
+        return jsonify({'error': 'Database error'}), 500
+
+    logging.info("delete_users_bulk: deleted %d users, %d blocked", len(eligible), len(blocked))
+    return jsonify({
+        'deleted': sorted(eligible),
+        'blocked': sorted(blocked),
+        'not_found': sorted(user_ids - found),
+        'reassigned': reassigned
+    }), 200
+
+
 # PROJECTS
 @api.route('/create_projects', methods=['POST'])
 @token_required
@@ -151,7 +356,7 @@ def list_projects(user_id):
         pagination = Project.query.paginate(page=page, per_page=per_page, error_out=False)
         projects = [{'id': project.id, 'name': project.name} for project in pagination.items]
         logging.info("list_projects: returned %d projects", len(projects))
-        return jsonify({
+        return render_response({
             'projects': projects,
             'total': pagination.total,
             'page': pagination.page,
@@ -185,10 +390,13 @@ def list_project_tasks(user_id, project_id):
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
-        pagination = Task.query.filter_by(project_id=project.id).paginate(page=page, per_page=per_page, error_out=False)
+        if include_archived():
+            pagination = tasks_with_archived(project_id=project.id).paginate(page=page, per_page=per_page, error_out=False)
+        else:
+            pagination = Task.query.filter_by(project_id=project.id).paginate(page=page, per_page=per_page, error_out=False)
         tasks = [{'id': task.id, 'title': task.title, 'description': task.description} for task in pagination.items]
         logging.info("list_project_tasks: returned %d tasks for project_id %s", len(tasks), project_id)
-        return jsonify({
+        return render_response({
             'tasks': tasks,
             'total': pagination.total,
             'page': pagination.page,
@@ -220,7 +428,8 @@ def create_tasks(user_id):
             description=data['description'],
             project_id=data['project_id'],
             assigned_to=data['assigned_to'],
-            status=status
+            status=status,
+            completed_at=datetime.datetime.utcnow() if status == 'Completed' else None
         )
         db.session.add(task)
         db.session.commit()
@@ -256,6 +465,7 @@ def create_tasks(user_id):
             db.session.add(dependency)
         db.session.commit()
         logging.info("Task dependencies set for task %s", task.id)
+        jobs.enqueue('task_assigned', {'task_id': task.id, 'assigned_to': task.assigned_to})
         return jsonify({'message': 'Task created successfully', 'task_id': task.id}), 201
     except SQLAlchemyError:
         db.session.rollback()
@@ -273,6 +483,8 @@ def get_tasks(user_id, task_id):
         return jsonify({'error': 'Invalid task ID format'}), 400
 
     task = Task.query.get(task_id)
+    if not task and include_archived():
+        task = db.session.get(ArchivedTask, task_id)
     if not task:
         logging.warning("get_tasks: task not found: %s", task_id)
         return jsonify({'error': 'Task not found'}), 404
@@ -329,6 +541,7 @@ def update_tasks(user_id, task_id):
             logging.error("Database error occurred in update_tasks (dependencies)", exc_info=True)
             return jsonify({'error': 'Database error'}), 500
 
+    newly_completed = False
     new_status = data.get('status')
     if new_status and new_status != task.status:
         if new_status not in allowed_statuses:
@@ -345,12 +558,17 @@ def update_tasks(user_id, task_id):
                 logging.warning("update_tasks: cannot mark as completed, dependencies incomplete for task %s", task.id)
                 return jsonify({'error': 'Cannot mark as Completed. All dependencies must be completed first.'}), 409
             task.status = 'Completed'
+            task.completed_at = datetime.datetime.utcnow()
+            newly_completed = True
         else:
             task.status = new_status
+            task.completed_at = None
 
     try:
         db.session.commit()
         logging.info("Task updated: %s", task.id)
+        if newly_completed:
+            jobs.enqueue('task_completed', {'task_id': task.id})
         return jsonify({'message': 'Task updated successfully'}), 200
     except SQLAlchemyError:
         db.session.rollback()
@@ -364,10 +582,13 @@ def get_user_tasks(user_id):
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
-        pagination = Task.query.filter_by(assigned_to=user_id).paginate(page=page, per_page=per_page, error_out=False)
+        if include_archived():
+            pagination = tasks_with_archived(assigned_to=user_id).paginate(page=page, per_page=per_page, error_out=False)
+        else:
+            pagination = Task.query.filter_by(assigned_to=user_id).paginate(page=page, per_page=per_page, error_out=False)
         tasks = [{'id': task.id, 'title': task.title, 'description': task.description} for task in pagination.items]
         logging.info("get_user_tasks: returned %d tasks for user_id %s", len(tasks), user_id)
-        return jsonify({
+        return render_response({
             'tasks': tasks,
             'total': pagination.total,
             'page': pagination.page,
@@ -389,10 +610,14 @@ def get_tasks_by_status(user_id, status):
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
-        pagination = Task.query.filter_by(status=status).paginate(page=page, per_page=per_page, error_out=False)
+        # Only completed tasks are ever archived
+        if status == 'Completed' and include_archived():
+            pagination = tasks_with_archived(status=status).paginate(page=page, per_page=per_page, error_out=False)
+        else:
+            pagination = Task.query.filter_by(status=status).paginate(page=page, per_page=per_page, error_out=False)
         tasks = [{'id': task.id, 'title': task.title, 'description': task.description} for task in pagination.items]
         logging.info("get_tasks_by_status: returned %d tasks for status %s", len(tasks), status)
-        return jsonify({
+        return render_response({
             'tasks': tasks,
             'total': pagination.total,
             'page': pagination.page,
@@ -401,4 +626,14 @@ def get_tasks_by_status(user_id, status):
         }), 200
     except SQLAlchemyError:
         logging.error("Database error occurred in get_tasks_by_status", exc_info=True)
-        return jsonify({'error': 'Database error'}), 500
\ No newline at end of file
+        return jsonify({'error': 'Database error'}), 500
+
+# MONITORING
+@api.route('/metrics', methods=['GET'])
+def metrics():
+    return jsonify({
+        'rate_limit': limiter.stats(),
+        'load_shedding': shedder.stats(),
+        'replicas': replicas.stats(),
+        'jobs': jobs.stats()
+    }), 200
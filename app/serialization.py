@@ -0,0 +1,127 @@
+import gzip
+import re
+from flask import current_app, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+# A run of this many digits may be an integer beyond 64 bits, which orjson
+# either rejects or silently turns into a float
+_LONG_NUMBER = re.compile(r'\d{19}')
+_LONG_NUMBER_BYTES = re.compile(rb'\d{19}')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson when it is installed.
+
+    Falls back to the standard library for anything orjson cannot handle
+    (e.g. integers beyond 64 bits, NaN literals) or when extra json.dumps or
+    json.loads keyword arguments are requested.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        try:
+            return self._orjson_dumps(obj).decode()
+        except TypeError:
+            return super().dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        if (_LONG_NUMBER if isinstance(s, str) else _LONG_NUMBER_BYTES).search(s):
+            return super().loads(s)
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            return super().loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        try:
+            body = self._orjson_dumps(obj, orjson.OPT_INDENT_2 if pretty else 0)
+        except TypeError:
+            # orjson.JSONEncodeError is a TypeError subclass
+            return super().response(obj)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+    def _orjson_dumps(self, obj, option=0):
+        option |= orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option)
+
+
+def render_response(payload):
+    """Serialize payload as MessagePack or JSON depending on the Accept header."""
+    if msgpack is not None:
+        best = request.accept_mimetypes.best_match(['application/json', MSGPACK_MIMETYPE])
+        if best == MSGPACK_MIMETYPE:
+            response = current_app.response_class(
+                msgpack.packb(payload, use_bin_type=True), mimetype=MSGPACK_MIMETYPE
+            )
+            response.vary.add('Accept')
+            return response
+    response = jsonify(payload)
+    response.vary.add('Accept')
+    return response
+
+
+class Compressor:
+    """Compress large API responses with brotli or gzip.
+
+    Only responses whose mimetype is in COMPRESS_MIMETYPES and whose body is
+    at least COMPRESS_MIN_SIZE bytes are compressed; small bodies are not
+    worth the CPU.
+    """
+
+    def init_app(self, app):
+        app.after_request(self._after_request)
+
+    def _encoding(self):
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def _after_request(self, response):
+        config = current_app.config
+        if (not config.get('COMPRESS_ENABLED', True)
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in config.get('COMPRESS_MIMETYPES', ())):
+            return response
+        encoding = self._encoding()
+        data = response.get_data()
+        if encoding is None or len(data) < config.get('COMPRESS_MIN_SIZE', 1024):
+            return response
+        if encoding == 'br':
+            data = brotli.compress(data, quality=config.get('COMPRESS_BROTLI_QUALITY', 4))
+        else:
+            data = gzip.compress(data, compresslevel=config.get('COMPRESS_GZIP_LEVEL', 6))
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
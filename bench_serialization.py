@@ -0,0 +1,96 @@
+"""
+Serialization benchmark for the TMS list endpoints.
+
+Seeds an in-memory database, then reports per endpoint the time spent per
+request and the bytes on the wire for each response format/encoding, plus
+the raw encoder cost for a 100-task page.
+
+    python bench_serialization.py > bench_output.txt
+"""
+import gzip
+import json
+import time
+from app import create_app, db
+from app.auth import generate_token
+from app.models import User, Project, Task
+from app import serialization
+
+ROUNDS = 50
+ENDPOINTS = [
+    '/api/list_users?per_page=100',
+    '/api/list_projects?per_page=100',
+    '/api/list_projects/1/tasks?per_page=100',
+    '/api/get_user_tasks?per_page=100',
+    '/api/get_status_tasks/Pending?per_page=100',
+]
+VARIANTS = [
+    ('json', 'application/json', 'identity'),
+    ('json+gzip', 'application/json', 'gzip'),
+    ('json+br', 'application/json', 'br'),
+    ('msgpack', 'application/msgpack', 'identity'),
+    ('msgpack+gzip', 'application/msgpack', 'gzip'),
+]
+
+
+def seed():
+    users = [User(username='user%d' % i, email='user%d@example.com' % i, password_hash='x') for i in range(100)]
+    projects = [Project(name='Project %d' % i) for i in range(100)]
+    db.session.add_all(users + projects)
+    db.session.commit()
+    db.session.add_all([
+        Task(title='Task %d' % i, description='Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 4,
+             project_id=1, assigned_to=1)
+        for i in range(200)
+    ])
+    db.session.commit()
+    return generate_token(users[0].id)
+
+
+def bench_endpoints(client, token):
+    print('%-45s %-14s %10s %10s' % ('endpoint', 'variant', 'ms/req', 'bytes'))
+    for url in ENDPOINTS:
+        for name, accept, encoding in VARIANTS:
+            if encoding == 'br' and serialization.brotli is None:
+                continue
+            if accept == serialization.MSGPACK_MIMETYPE and serialization.msgpack is None:
+                continue
+            headers = {'Authorization': 'Bearer %s' % token, 'Accept': accept, 'Accept-Encoding': encoding}
+            start = time.perf_counter()
+            for _ in range(ROUNDS):
+                response = client.get(url, headers=headers)
+            elapsed = (time.perf_counter() - start) / ROUNDS * 1000
+            print('%-45s %-14s %10.3f %10d' % (url, name, elapsed, len(response.data)))
+
+
+def bench_encoders():
+    page = {
+        'tasks': [{'id': i, 'title': 'Task %d' % i, 'description': 'Lorem ipsum dolor sit amet. ' * 8} for i in range(100)],
+        'total': 1000, 'page': 1, 'per_page': 100, 'pages': 10
+    }
+    encoders = [('json (stdlib)', lambda: json.dumps(page, sort_keys=True, separators=(',', ':')).encode())]
+    if serialization.orjson is not None:
+        encoders.append(('orjson', lambda: serialization.orjson.dumps(page, option=serialization.orjson.OPT_SORT_KEYS)))
+    if serialization.msgpack is not None:
+        encoders.append(('msgpack', lambda: serialization.msgpack.packb(page, use_bin_type=True)))
+    raw = encoders[0][1]()
+    encoders.append(('json + gzip', lambda: gzip.compress(raw, compresslevel=6)))
+    if serialization.brotli is not None:
+        encoders.append(('json + brotli', lambda: serialization.brotli.compress(raw, quality=4)))
+
+    print('\n%-20s %12s %10s' % ('encoder (100 tasks)', 'us/op', 'bytes'))
+    for name, encode in encoders:
+        start = time.perf_counter()
+        for _ in range(ROUNDS * 10):
+            data = encode()
+        elapsed = (time.perf_counter() - start) / (ROUNDS * 10) * 1e6
+        print('%-20s %12.1f %10d' % (name, elapsed, len(data)))
+
+
+if __name__ == '__main__':
+    app = create_app('testing')
+    app.config['COMPRESS_MIN_SIZE'] = 0
+    with app.app_context():
+        db.create_all()
+        token = seed()
+    bench_endpoints(app.test_client(), token)
+    bench_encoders()
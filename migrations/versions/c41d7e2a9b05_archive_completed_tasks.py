@@ -0,0 +1,70 @@
+"""Archive completed tasks
+
+Revision ID: c41d7e2a9b05
+Revises: 5e69497da914
+Create Date: 2026-10-19 10:12:41.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7e2a9b05'
+down_revision = '5e69497da914'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('archived_task',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('title', sa.String(length=80), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=80), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('assigned_to', sa.Integer(), nullable=False),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['assigned_to'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('archived_task', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_archived_task_assigned_to'), ['assigned_to'], unique=False)
+        batch_op.create_index(batch_op.f('ix_archived_task_project_id'), ['project_id'], unique=False)
+
+    op.create_table('archived_task_dependency',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('dependent_task_id', sa.Integer(), nullable=False),
+    sa.Column('depends_on_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('archived_task_dependency', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_archived_task_dependency_dependent_task_id'), ['dependent_task_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_archived_task_dependency_depends_on_id'), ['depends_on_id'], unique=False)
+
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('completed_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_task_completed_at'), ['completed_at'], unique=False)
+
+    # Start the archive clock for tasks completed before completed_at existed
+    op.execute("UPDATE task SET completed_at = CURRENT_TIMESTAMP WHERE status = 'Completed'")
+
+
+def downgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_task_completed_at'))
+        batch_op.drop_column('completed_at')
+
+    with op.batch_alter_table('archived_task_dependency', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_archived_task_dependency_depends_on_id'))
+        batch_op.drop_index(batch_op.f('ix_archived_task_dependency_dependent_task_id'))
+
+    op.drop_table('archived_task_dependency')
+
+    with op.batch_alter_table('archived_task', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_archived_task_project_id'))
+        batch_op.drop_index(batch_op.f('ix_archived_task_assigned_to'))
+
+    op.drop_table('archived_task')
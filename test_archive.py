@@ -0,0 +1,125 @@
+import datetime
+import unittest
+from unittest import mock
+from sqlalchemy import update
+from app import archive, create_app, db
+from app.archive import archive_completed_tasks
+from app.auth import generate_token
+from app.models import User, Project, Task, TaskDependency, ArchivedTask, ArchivedTaskDependency
+
+
+class ArchiveTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        old = datetime.datetime.utcnow() - datetime.timedelta(days=365)
+        with self.app.app_context():
+            db.create_all()
+            user = User(username='user', email='user@example.com')
+            user.set_password('secret')
+            project = Project(name='Test Project')
+            db.session.add_all([user, project])
+            db.session.commit()
+            self.project_id = project.id
+            tasks = [
+                Task(title='Old 1', description='', status='Completed', completed_at=old, project_id=project.id, assigned_to=user.id),
+                Task(title='Old 2', description='', status='Completed', completed_at=old, project_id=project.id, assigned_to=user.id),
+                Task(title='Recent', description='', status='Completed', completed_at=datetime.datetime.utcnow(), project_id=project.id, assigned_to=user.id),
+                Task(title='Open', description='', status='Pending', project_id=project.id, assigned_to=user.id),
+            ]
+            db.session.add_all(tasks)
+            db.session.commit()
+            self.task_ids = [task.id for task in tasks]
+            db.session.add_all([
+                TaskDependency(dependent_task_id=tasks[1].id, depends_on_id=tasks[0].id),
+                TaskDependency(dependent_task_id=tasks[3].id, depends_on_id=tasks[2].id),
+            ])
+            db.session.commit()
+            self.headers = {'Authorization': 'Bearer %s' % generate_token(user.id)}
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _archive(self, batch_size=1):
+        with self.app.app_context():
+            cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=90)
+            return archive_completed_tasks(cutoff, batch_size=batch_size)
+
+    def test_archive_moves_old_completed_tasks_and_edges(self):
+        self.assertEqual(self._archive(), 2)
+        with self.app.app_context():
+            self.assertEqual(sorted(t.title for t in Task.query), ['Open', 'Recent'])
+            self.assertEqual(ArchivedTask.query.count(), 2)
+            self.assertEqual(TaskDependency.query.count(), 1)
+            self.assertEqual(ArchivedTaskDependency.query.count(), 1)
+        self.assertEqual(self._archive(), 0)
+
+    def test_archive_twice_with_reused_edge_ids(self):
+        self.assertEqual(self._archive(), 2)
+        old = datetime.datetime.utcnow() - datetime.timedelta(days=365)
+        with self.app.app_context():
+            task = Task(title='Old 3', description='', status='Completed', completed_at=old,
+                        project_id=self.project_id, assigned_to=1)
+            db.session.add(task)
+            # update_tasks replaces dependencies by deleting them, freeing the highest edge id
+            TaskDependency.query.delete()
+            db.session.commit()
+            db.session.add(TaskDependency(dependent_task_id=task.id, depends_on_id=self.task_ids[2]))
+            db.session.commit()
+        self.assertEqual(self._archive(), 1)
+        with self.app.app_context():
+            self.assertEqual(ArchivedTaskDependency.query.count(), 2)
+
+    def test_task_reopened_mid_chunk_is_not_archived(self):
+        real_insert = archive.insert
+
+        def reopen_then_insert(table):
+            # update_tasks reopens the task after the chunk's ids were selected
+            if table is ArchivedTask:
+                db.session.execute(update(Task).where(Task.id == self.task_ids[0]).values(status='Pending'))
+            return real_insert(table)
+
+        with mock.patch.object(archive, 'insert', side_effect=reopen_then_insert):
+            self.assertEqual(self._archive(batch_size=10), 1)
+        with self.app.app_context():
+            self.assertEqual(db.session.get(Task, self.task_ids[0]).status, 'Pending')
+            self.assertIsNone(db.session.get(ArchivedTask, self.task_ids[0]))
+            self.assertIsNotNone(db.session.get(ArchivedTask, self.task_ids[1]))
+
+    def test_read_endpoints_hide_archived_by_default(self):
+        self._archive()
+        response = self.client.get('/api/get_status_tasks/Completed', headers=self.headers)
+        self.assertEqual(response.get_json()['total'], 1)
+        response = self.client.get('/api/get_status_tasks/Completed?include_archived=1', headers=self.headers)
+        self.assertEqual([t['id'] for t in response.get_json()['tasks']], self.task_ids[:3])
+        response = self.client.get('/api/list_projects/%d/tasks?include_archived=1&per_page=3' % self.project_id, headers=self.headers)
+        body = response.get_json()
+        self.assertEqual((body['total'], len(body['tasks'])), (4, 3))
+        response = self.client.get('/api/get_user_tasks?include_archived=1', headers=self.headers)
+        self.assertEqual(response.get_json()['total'], 4)
+
+    def test_get_archived_task(self):
+        self._archive()
+        url = '/api/get_tasks/%d' % self.task_ids[0]
+        self.assertEqual(self.client.get(url, headers=self.headers).status_code, 404)
+        response = self.client.get(url + '?include_archived=1', headers=self.headers)
+        self.assertEqual(response.get_json()['title'], 'Old 1')
+
+    def test_completion_timestamp_follows_status(self):
+        url = '/api/update_tasks/%d' % self.task_ids[3]
+        self.client.put(url, json={'status': 'Completed'}, headers=self.headers)
+        with self.app.app_context():
+            self.assertIsNotNone(db.session.get(Task, self.task_ids[3]).completed_at)
+        self.client.put(url, json={'status': 'Pending'}, headers=self.headers)
+        with self.app.app_context():
+            self.assertIsNone(db.session.get(Task, self.task_ids[3]).completed_at)
+
+    def test_cli_command(self):
+        result = self.app.test_cli_runner().invoke(args=['archive-tasks', '--batch-size', '1'])
+        self.assertIn('Archived 2 tasks', result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
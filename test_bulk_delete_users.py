@@ -0,0 +1,109 @@
+import unittest
+from datetime import datetime
+from app import create_app, db
+from app.auth import generate_token
+from app.models import User, Project, Task, ArchivedTask
+
+
+class BulkDeleteUsersTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            users = [User(username='user%d' % i, email='user%d@example.com' % i) for i in range(4)]
+            for user in users:
+                user.set_password('secret')
+            project = Project(name='Test Project')
+            db.session.add_all(users + [project])
+            db.session.commit()
+            self.user_ids = [user.id for user in users]
+            db.session.add_all([
+                Task(title='Open', description='', project_id=project.id, assigned_to=users[1].id, status='Pending'),
+                Task(title='Busy', description='', project_id=project.id, assigned_to=users[1].id, status='In Progress'),
+                Task(title='Done', description='', project_id=project.id, assigned_to=users[1].id, status='Completed'),
+                Task(title='Other', description='', project_id=project.id, assigned_to=users[2].id, status='Pending'),
+            ])
+            db.session.commit()
+            self.headers = {'Authorization': 'Bearer %s' % generate_token(users[0].id)}
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_reassign_moves_only_open_tasks(self):
+        payload = {'from_user_id': self.user_ids[1], 'to_user_id': self.user_ids[3]}
+        response = self.client.post('/api/reassign_tasks', json=payload, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['reassigned'], 2)
+        with self.app.app_context():
+            self.assertEqual(Task.query.filter_by(assigned_to=self.user_ids[3]).count(), 2)
+            self.assertEqual(Task.query.filter_by(title='Done').first().assigned_to, self.user_ids[1])
+
+    def test_reassign_rejects_unknown_user(self):
+        payload = {'from_user_id': self.user_ids[1], 'to_user_id': 999}
+        response = self.client.post('/api/reassign_tasks', json=payload, headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    def test_bulk_delete_skips_users_with_open_tasks(self):
+        payload = {'user_ids': [self.user_ids[1], self.user_ids[2], self.user_ids[3], 999]}
+        response = self.client.post('/api/delete_users/bulk', json=payload, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body['deleted'], [self.user_ids[3]])
+        self.assertEqual(body['blocked'], [self.user_ids[1], self.user_ids[2]])
+        self.assertEqual(body['not_found'], [999])
+        with self.app.app_context():
+            self.assertIsNone(db.session.get(User, self.user_ids[3]))
+
+    def test_bulk_delete_with_reassignment(self):
+        payload = {'user_ids': [self.user_ids[1], self.user_ids[2]], 'reassign_to': self.user_ids[3]}
+        response = self.client.post('/api/delete_users/bulk', json=payload, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        # user1 still owns a completed task, so only their open tasks move
+        self.assertEqual(body['deleted'], [self.user_ids[2]])
+        self.assertEqual(body['blocked'], [self.user_ids[1]])
+        self.assertEqual(body['reassigned'], 3)
+        with self.app.app_context():
+            self.assertEqual(User.query.count(), 3)
+            self.assertEqual(Task.query.filter_by(assigned_to=self.user_ids[3]).count(), 3)
+
+    def test_bulk_delete_blocks_users_referenced_by_any_task(self):
+        with self.app.app_context():
+            db.session.add(ArchivedTask(
+                id=100, title='Old', description='', status='Completed', project_id=1,
+                assigned_to=self.user_ids[3], completed_at=datetime.utcnow(), archived_at=datetime.utcnow()
+            ))
+            db.session.commit()
+            with db.engine.connect() as conn:
+                conn.exec_driver_sql('PRAGMA foreign_keys=ON')
+        payload = {'user_ids': self.user_ids[1:], 'reassign_to': self.user_ids[0]}
+        response = self.client.post('/api/delete_users/bulk', json=payload, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body['deleted'], [self.user_ids[2]])
+        self.assertEqual(body['blocked'], [self.user_ids[1], self.user_ids[3]])
+        with self.app.app_context():
+            self.assertEqual(User.query.count(), 3)
+            self.assertEqual(Task.query.filter_by(title='Done').first().assigned_to, self.user_ids[1])
+
+    def test_boolean_ids_are_rejected(self):
+        for payload in ({'user_ids': [True]}, {'user_ids': [self.user_ids[3]], 'reassign_to': True}):
+            response = self.client.post('/api/delete_users/bulk', json=payload, headers=self.headers)
+            self.assertEqual(response.status_code, 400)
+        payload = {'from_user_id': True, 'to_user_id': self.user_ids[3]}
+        self.assertEqual(self.client.post('/api/reassign_tasks', json=payload, headers=self.headers).status_code, 400)
+        with self.app.app_context():
+            self.assertEqual(User.query.count(), 4)
+
+    def test_single_delete_still_blocks_on_open_tasks(self):
+        response = self.client.delete('/api/delete_users/%d' % self.user_ids[1], headers=self.headers)
+        self.assertEqual(response.status_code, 409)
+        response = self.client.delete('/api/delete_users/%d' % self.user_ids[3], headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+from app import create_app, db
+from app.auth import generate_token
+from app.models import User, hash_passwords, make_hash_pool, get_hash_pool
+from werkzeug.security import check_password_hash
+
+
+class BulkUsersTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['BULK_INSERT_BATCH_SIZE'] = 2
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            admin = User(username='admin', email='admin@example.com')
+            admin.set_password('secret')
+            db.session.add(admin)
+            db.session.commit()
+            self.admin_id = admin.id
+            self.headers = {'Authorization': 'Bearer %s' % generate_token(admin.id)}
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _payload(self, count, start=0):
+        return {'users': [
+            {'username': 'user%d' % i, 'email': 'user%d@example.com' % i, 'password': 'pass%d' % i}
+            for i in range(start, start + count)
+        ]}
+
+    def test_bulk_create_inserts_in_batches(self):
+        response = self.client.post('/api/create_users/bulk', json=self._payload(5), headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+        body = response.get_json()
+        self.assertEqual(len(body['created']), 5)
+        self.assertEqual(body['conflicts'], [])
+        with self.app.app_context():
+            self.assertEqual(User.query.count(), 6)
+            self.assertTrue(User.query.filter_by(username='user3').first().check_password('pass3'))
+
+    def test_bulk_create_skips_existing_and_duplicate_entries(self):
+        payload = self._payload(2)
+        payload['users'].append({'username': 'admin', 'email': 'other@example.com', 'password': 'x'})
+        payload['users'].append({'username': 'user9', 'email': 'user0@example.com', 'password': 'x'})
+        response = self.client.post('/api/create_users/bulk', json=payload, headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json()['conflicts'], ['admin', 'user9'])
+        with self.app.app_context():
+            self.assertEqual(User.query.count(), 3)
+
+    def test_bulk_create_rejects_non_string_fields(self):
+        payload = self._payload(4)
+        payload['users'][0]['email'] = 123
+        payload['users'][1]['username'] = ['b']
+        payload['users'][2]['password'] = None
+        response = self.client.post('/api/create_users/bulk', json=payload, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([detail['index'] for detail in response.get_json()['details']], [0, 1, 2])
+        with self.app.app_context():
+            self.assertEqual(User.query.count(), 1)
+
+    def test_bulk_create_rejects_invalid_entries(self):
+        payload = self._payload(2)
+        payload['users'][1]['email'] = 'not-an-email'
+        response = self.client.post('/api/create_users/bulk', json=payload, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()['details'], [{'index': 1, 'error': 'Invalid email format'}])
+        with self.app.app_context():
+            self.assertEqual(User.query.count(), 1)
+
+    def test_parallel_hashing_matches_set_password(self):
+        pool = make_hash_pool(2)
+        try:
+            hashes = hash_passwords(['a', 'b', 'c', 'd'], pool=pool, workers=2, parallel_min=2)
+        finally:
+            pool.shutdown()
+        self.assertEqual(len(hashes), 4)
+        self.assertTrue(all(check_password_hash(h, p) for h, p in zip(hashes, 'abcd')))
+
+    def test_hash_pool_is_created_on_first_use(self):
+        self.assertIsNone(get_hash_pool(self.app))
+        self.app.config['BULK_HASH_WORKERS'] = 2
+        self.assertNotIn('password_hash_pool', self.app.extensions)
+        pool = get_hash_pool(self.app)
+        try:
+            self.assertIs(get_hash_pool(self.app), pool)
+            self.assertIs(self.app.extensions['password_hash_pool'], pool)
+        finally:
+            pool.shutdown()
+
+    def test_batch_lookup(self):
+        self.client.post('/api/create_users/bulk', json=self._payload(3), headers=self.headers)
+        response = self.client.get('/api/get_users?ids=2,4,99', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual([user['id'] for user in body['users']], [2, 4])
+        self.assertEqual(body['missing'], [99])
+        self.assertEqual(self.client.get('/api/get_users?ids=a,b', headers=self.headers).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
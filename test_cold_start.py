@@ -0,0 +1,84 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+# Optional total import time allowed for `from app import create_app; create_app()`, in milliseconds.
+# Wall-clock timings vary too much between machines to enforce by default, so the budget check
+# only runs when COLD_START_BUDGET_MS is set; LAZY_MODULES catches import regressions everywhere.
+COLD_START_BUDGET_MS = os.getenv('COLD_START_BUDGET_MS')
+RUNS = 3
+
+# Modules only needed by rarely used code paths; they must not load at start-up
+LAZY_MODULES = ('flask_migrate', 'alembic', 'jwt', 'concurrent.futures.process')
+
+# Profiled configs. 'default' turns on what TestingConfig disables: the password
+# hashing pool and the SQLite job queue, with a throwaway database.
+CONFIGS = {
+    'testing': {},
+    'default': {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'BULK_HASH_WORKERS': '4',
+        'JOBS_BACKEND': 'sqlite',
+        'RATELIMIT_BACKEND': 'sqlite',
+    },
+}
+
+
+def import_profile(config_name):
+    """Run create_app(config_name) in a fresh interpreter under -X importtime.
+
+    Returns {module: cumulative_us} for top-level imports, the set of all
+    imported modules and the number of threads running once create_app() returns.
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        env = dict(
+            os.environ,
+            JOBS_SQLITE_PATH=os.path.join(tmpdir, 'jobs.db'),
+            RATELIMIT_SQLITE_PATH=os.path.join(tmpdir, 'ratelimit.db'),
+            **CONFIGS[config_name]
+        )
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             'import threading; from app import create_app; create_app(%r); print(threading.active_count())' % config_name],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env, capture_output=True, text=True, check=True
+        )
+    top_level, imported = {}, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        imported.add(name.strip())
+        if not name[1:].startswith(' '):
+            top_level[name.strip()] = int(cumulative)
+    return top_level, imported, int(result.stdout.split()[-1])
+
+
+class ColdStartTestCase(unittest.TestCase):
+    @unittest.skipUnless(COLD_START_BUDGET_MS, 'set COLD_START_BUDGET_MS to enforce an import time budget')
+    def test_create_app_within_import_budget(self):
+        budget = float(COLD_START_BUDGET_MS)
+        for config_name in CONFIGS:
+            with self.subTest(config=config_name):
+                # Best of several runs so one noisy run does not fail the budget
+                top_level = min((import_profile(config_name)[0] for _ in range(RUNS)), key=lambda profile: sum(profile.values()))
+                total_ms = sum(top_level.values()) / 1000
+                slowest = sorted(top_level.items(), key=lambda item: -item[1])[:5]
+                self.assertLessEqual(
+                    total_ms, budget,
+                    'create_app(%r) imports took %.0f ms (budget %.0f ms); slowest: %s' % (config_name, total_ms, budget, slowest)
+                )
+
+    def test_rarely_used_modules_are_lazy(self):
+        for config_name in CONFIGS:
+            with self.subTest(config=config_name):
+                _, imported, threads = import_profile(config_name)
+                self.assertEqual([name for name in LAZY_MODULES if name in imported], [])
+                # Job workers and the hashing pool start on first use, not in create_app()
+                self.assertEqual(threads, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
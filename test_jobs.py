@@ -0,0 +1,148 @@
+import os
+import tempfile
+import unittest
+from app import create_app, db, jobs
+from app.auth import generate_token
+from app.jobs import SQLiteBackend
+from app.models import User, Project, Task, TaskDependency
+
+
+class JobQueueTestCase(unittest.TestCase):
+    backend = 'memory'
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.app = create_app('testing')
+        self.app.config.update(
+            JOBS_EAGER=False,
+            JOBS_BACKEND=self.backend,
+            JOBS_SQLITE_PATH=os.path.join(self.tmpdir.name, 'jobs.db'),
+            JOBS_WORKERS=1,
+            JOBS_BATCH_SIZE=10,
+            JOBS_RETRY_BACKOFF=0.01,
+            JOBS_POLL_INTERVAL=0.01
+        )
+        self.calls = []
+        self.failures = 0
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+    def tearDown(self):
+        jobs.shutdown()
+        self.ctx.pop()
+        jobs.handlers.pop('test_job', None)
+        self.tmpdir.cleanup()
+
+    def _start(self, queued=()):
+        """Initialise the queue with payloads already waiting, as if left by a previous process."""
+        if self.backend == 'sqlite':
+            previous = SQLiteBackend(self.app.config['JOBS_SQLITE_PATH'])
+            for payload in queued:
+                previous.push('test_job', payload)
+            jobs.init_app(self.app)
+            self.assertEqual(self.app.extensions['jobs'].workers, [])
+            self.app.test_client().get('/api/metrics')
+        else:
+            jobs.init_app(self.app)
+            for payload in queued:
+                self.app.extensions['jobs'].backend.push('test_job', payload)
+            jobs._start_workers(self.app.extensions['jobs'])
+        self.app.extensions['jobs'].counters.incr('enqueued', len(queued))
+
+    def _register(self, fail_times=0):
+        @jobs.handler('test_job')
+        def handle(payloads):
+            if self.failures < fail_times:
+                self.failures += 1
+                raise RuntimeError('boom')
+            self.calls.append(payloads)
+
+    def test_same_type_jobs_are_batched(self):
+        self._register()
+        self._start([{'n': i} for i in range(5)])
+        self.assertTrue(jobs.wait_idle())
+        self.assertEqual(self.calls, [[{'n': i} for i in range(5)]])
+        stats = jobs.stats()
+        self.assertEqual((stats['processed'], stats['batches'], stats['depth']), (5, 1, 0))
+
+    def test_failed_jobs_are_retried(self):
+        self._register(fail_times=2)
+        self._start()
+        jobs.enqueue('test_job', {'n': 1})
+        self.assertTrue(jobs.wait_idle())
+        self.assertEqual(self.calls, [[{'n': 1}]])
+        stats = jobs.stats()
+        self.assertEqual((stats['failed'], stats['retried'], stats['dead']), (2, 2, 0))
+
+    def test_jobs_are_dropped_after_max_retries(self):
+        self._register(fail_times=10)
+        self.app.config['JOBS_MAX_RETRIES'] = 1
+        self._start()
+        jobs.enqueue('test_job', {'n': 1})
+        self.assertTrue(jobs.wait_idle())
+        stats = jobs.stats()
+        self.assertEqual((stats['dead'], stats['depth']), (1, 0))
+
+
+class SQLiteJobQueueTestCase(JobQueueTestCase):
+    backend = 'sqlite'
+
+    def test_workers_start_without_enqueue(self):
+        self._register()
+        self._start([{'n': 1}])
+        self.assertEqual(jobs.stats()['workers'], 1)
+        self.assertTrue(jobs.wait_idle())
+        self.assertEqual(self.calls, [[{'n': 1}]])
+
+    def test_forked_process_starts_its_own_workers(self):
+        self._register()
+        self._start()
+        state = self.app.extensions['jobs']
+        inherited = state.workers
+        # As seen by a pre-fork worker: the parent's threads are listed but not running here
+        state.pid = -1
+        self.app.test_client().get('/api/metrics')
+        self.assertEqual(len(state.workers), 1)
+        self.assertIsNot(state.workers[0], inherited[0])
+        SQLiteBackend(self.app.config['JOBS_SQLITE_PATH']).push('test_job', {'n': 1})
+        state.counters.incr('enqueued')
+        self.assertTrue(jobs.wait_idle())
+        self.assertEqual(self.calls, [[{'n': 1}]])
+
+
+class TaskJobsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            user = User(username='user', email='user@example.com')
+            user.set_password('secret')
+            project = Project(name='Test Project')
+            db.session.add_all([user, project])
+            db.session.commit()
+            first = Task(title='First', description='', project_id=project.id, assigned_to=user.id)
+            second = Task(title='Second', description='', project_id=project.id, assigned_to=user.id)
+            db.session.add_all([first, second])
+            db.session.commit()
+            db.session.add(TaskDependency(dependent_task_id=second.id, depends_on_id=first.id))
+            db.session.commit()
+            self.first_id, self.second_id = first.id, second.id
+            self.headers = {'Authorization': 'Bearer %s' % generate_token(user.id)}
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_completing_a_task_notifies_unblocked_dependents(self):
+        with self.assertLogs(level='INFO') as logs:
+            response = self.client.put('/api/update_tasks/%d' % self.first_id, json={'status': 'Completed'}, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('task %d is unblocked' % self.second_id, '\n'.join(logs.output))
+        with self.app.app_context():
+            self.assertEqual(jobs.stats()['processed'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
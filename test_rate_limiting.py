@@ -0,0 +1,146 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from sqlalchemy import event
+from app import create_app, db
+from app.auth import generate_token
+from app.models import User
+from app.ratelimit import MemoryBackend, SQLiteBackend
+
+
+class TokenBucketBackendTestCase(unittest.TestCase):
+    def test_memory_backend_allows_burst_then_limits(self):
+        backend = MemoryBackend()
+        results = [backend.consume('user:1', 1, 3)[0] for _ in range(4)]
+        self.assertEqual(results, [True, True, True, False])
+        allowed, retry_after = backend.consume('user:1', 1, 3)
+        self.assertFalse(allowed)
+        self.assertGreater(retry_after, 0)
+        self.assertTrue(backend.consume('user:2', 1, 3)[0])
+
+    def test_sqlite_backend_is_shared_between_workers(self):
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        try:
+            worker_a = SQLiteBackend(path)
+            worker_b = SQLiteBackend(path)
+            self.assertTrue(worker_a.consume('user:1', 0.001, 2)[0])
+            self.assertTrue(worker_b.consume('user:1', 0.001, 2)[0])
+            self.assertFalse(worker_a.consume('user:1', 0.001, 2)[0])
+            self.assertFalse(worker_b.consume('user:1', 0.001, 2)[0])
+        finally:
+            os.remove(path)
+
+
+class RateLimitingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config.update(
+            RATELIMIT_ENABLED=True,
+            RATELIMIT_USER_RATE=0.001,
+            RATELIMIT_USER_BURST=3,
+            RATELIMIT_ROUTE_LIMITS={}
+        )
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            users = [User(username='user%d' % i, email='user%d@example.com' % i) for i in (1, 2)]
+            for user in users:
+                user.set_password('secret')
+            db.session.add_all(users)
+            db.session.commit()
+            self.headers = [{'Authorization': 'Bearer %s' % generate_token(user.id)} for user in users]
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_user_is_limited_after_burst(self):
+        codes = [self.client.get('/api/list_users', headers=self.headers[0]).status_code for _ in range(4)]
+        self.assertEqual(codes, [200, 200, 200, 429])
+        response = self.client.get('/api/list_users', headers=self.headers[0])
+        self.assertIn('Retry-After', response.headers)
+        self.assertEqual(self.client.get('/api/list_users', headers=self.headers[1]).status_code, 200)
+
+    def test_route_limit_applies_per_route(self):
+        self.app.config['RATELIMIT_ROUTE_LIMITS'] = {'api.list_users': (0.001, 1)}
+        self.assertEqual(self.client.get('/api/list_users', headers=self.headers[0]).status_code, 200)
+        self.assertEqual(self.client.get('/api/list_users', headers=self.headers[0]).status_code, 429)
+        self.assertEqual(self.client.get('/api/list_projects', headers=self.headers[0]).status_code, 200)
+
+    def test_metrics_expose_counters(self):
+        for _ in range(4):
+            self.client.get('/api/list_users', headers=self.headers[0])
+        stats = self.client.get('/api/metrics').get_json()
+        self.assertEqual(stats['rate_limit']['allowed'], 3)
+        self.assertEqual(stats['rate_limit']['limited'], 1)
+
+    def test_locked_backend_fails_open(self):
+        def locked(key, rate, burst):
+            raise sqlite3.OperationalError('database is locked')
+
+        self.app.extensions['ratelimit'].backend.consume = locked
+        self.assertEqual(self.client.get('/api/list_users', headers=self.headers[0]).status_code, 200)
+        stats = self.client.get('/api/metrics').get_json()
+        self.assertEqual(stats['rate_limit']['backend_errors'], 1)
+
+
+class LoadSheddingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_concurrency_cap_sheds_with_retry_after(self):
+        self.app.extensions['load_shedder'].max_concurrent = 0
+        response = self.client.get('/api/list_users')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], str(self.app.config['SHED_RETRY_AFTER']))
+        stats = self.app.extensions['load_shedder'].counters.snapshot()
+        self.assertEqual(stats['shed_concurrency'], 1)
+        self.assertEqual(stats['in_flight'], 0)
+
+    def _login(self):
+        return self.client.post('/api/auth/login', json={'username': 'nobody', 'password': 'x'})
+
+    def test_slow_pool_checkout_sheds_until_cooldown(self):
+        state = self.app.extensions['load_shedder']
+        state.pool_wait_threshold = -1
+        self.assertEqual(self._login().status_code, 401)
+        self.assertGreaterEqual(state.counters.get('last_pool_wait_ms'), 0)
+        state.pool_wait_threshold = 10
+        self.assertEqual(self._login().status_code, 503)
+        self.assertEqual(self.client.get('/api/metrics').status_code, 503)
+        state.overloaded_until = 0
+        self.assertEqual(self.client.get('/api/metrics').status_code, 200)
+        self.assertEqual(state.counters.get('shed_pool_wait'), 2)
+        self.assertEqual(state.counters.get('in_flight'), 0)
+
+    def test_requests_without_queries_do_not_check_out_connections(self):
+        checkouts = []
+
+        def on_checkout(*args):
+            checkouts.append(1)
+
+        with self.app.app_context():
+            pool = db.engine.pool
+        event.listen(pool, 'checkout', on_checkout)
+        try:
+            self.assertEqual(self.client.get('/api/metrics').status_code, 200)
+            self.assertEqual(self.client.get('/api/list_users').status_code, 401)
+            self.assertEqual(checkouts, [])
+            self._login()
+            self.assertEqual(len(checkouts), 1)
+        finally:
+            event.remove(pool, 'checkout', on_checkout)
+
+if __name__ == '__main__':
+    unittest.main()
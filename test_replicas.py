@@ -0,0 +1,91 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from app import create_app, db
+from app.auth import generate_token
+from app.config import config, TestingConfig
+from app.models import User
+
+
+class ReplicaTestCase(unittest.TestCase):
+    """Runs against two SQLite files; the harness plays the replication role by copying primary to replica."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.primary_path = os.path.join(self.tmpdir.name, 'primary.db')
+        self.replica_path = os.path.join(self.tmpdir.name, 'replica.db')
+
+        class ReplicaConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + self.primary_path
+            SQLALCHEMY_REPLICA_URIS = ['sqlite:///' + self.replica_path]
+            REPLICA_LAG_CHECK_INTERVAL = 0
+
+        config['replica_test'] = ReplicaConfig
+        self.app = create_app('replica_test')
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            self._add_user('user0')
+            self.headers = {'Authorization': 'Bearer %s' % generate_token(1)}
+        self.sync()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            for engine in list(db.engines.values()) + list(self.app.extensions['replicas'].engines.values()):
+                engine.dispose()
+        del config['replica_test']
+        self.tmpdir.cleanup()
+
+    def sync(self):
+        source = sqlite3.connect(self.primary_path)
+        target = sqlite3.connect(self.replica_path)
+        source.backup(target)
+        source.close()
+        target.close()
+
+    def _add_user(self, username):
+        user = User(username=username, email='%s@example.com' % username)
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+
+    def _total_users(self):
+        return self.client.get('/api/list_users', headers=self.headers).get_json()['total']
+
+    def test_get_reads_from_replica(self):
+        with self.app.app_context():
+            self._add_user('user1')
+        self.assertEqual(self._total_users(), 1)
+        self.sync()
+        self.assertEqual(self._total_users(), 2)
+        self.assertEqual(self.app.extensions['replicas'].counters.get('replica_reads'), 2)
+
+    def test_writes_go_to_primary(self):
+        payload = {'username': 'user1', 'email': 'user1@example.com', 'password': 'secret'}
+        self.assertEqual(self.client.post('/api/create_users', json=payload).status_code, 201)
+        with sqlite3.connect(self.primary_path) as conn:
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM user').fetchone()[0], 2)
+        with sqlite3.connect(self.replica_path) as conn:
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM user').fetchone()[0], 1)
+
+    def test_stale_replica_falls_back_to_primary(self):
+        with self.app.app_context():
+            self._add_user('user1')
+        self.app.extensions['replicas'].set_lag('replica_0', 60)
+        self.assertEqual(self._total_users(), 2)
+        self.assertEqual(self.app.extensions['replicas'].counters.get('primary_fallbacks'), 1)
+
+    def test_read_after_write_stays_on_primary(self):
+        with self.app.test_request_context('/', method='GET'):
+            self.app.preprocess_request()
+            self.assertEqual(User.query.count(), 1)
+            db.session.add(User(username='user1', email='user1@example.com', password_hash='x'))
+            db.session.flush()
+            self.assertEqual(User.query.count(), 2)
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    unittest.main()
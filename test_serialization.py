@@ -0,0 +1,87 @@
+import gzip
+import json
+import unittest
+from app import create_app, db
+from app.auth import generate_token
+from app.models import User, Project, Task
+from app import serialization
+
+
+class SerializationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['COMPRESS_MIN_SIZE'] = 512
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            user = User(username='user', email='user@example.com')
+            user.set_password('secret')
+            project = Project(name='Test Project')
+            db.session.add_all([user, project])
+            db.session.commit()
+            db.session.add_all([
+                Task(title='Task %d' % i, description='Description ' * 20, project_id=project.id, assigned_to=user.id)
+                for i in range(20)
+            ])
+            db.session.commit()
+            self.headers = {'Authorization': 'Bearer %s' % generate_token(user.id)}
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _get(self, url, **headers):
+        return self.client.get(url, headers=dict(self.headers, **headers))
+
+    def test_json_is_default(self):
+        response = self._get('/api/get_user_tasks?per_page=2', **{'Accept-Encoding': 'identity'})
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(len(json.loads(response.data)['tasks']), 2)
+        self.assertIn('Accept', response.headers['Vary'])
+
+    @unittest.skipIf(serialization.msgpack is None, 'msgpack not installed')
+    def test_msgpack_negotiation(self):
+        as_json = self._get('/api/get_user_tasks?per_page=5').get_json()
+        response = self._get('/api/get_user_tasks?per_page=5', Accept='application/msgpack')
+        self.assertEqual(response.mimetype, 'application/msgpack')
+        self.assertEqual(serialization.msgpack.unpackb(response.data), as_json)
+
+    def test_large_response_is_gzipped(self):
+        response = self._get('/api/get_user_tasks?per_page=20', **{'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(response.data))['tasks']), 20)
+
+    def test_small_response_is_not_compressed(self):
+        response = self._get('/api/list_projects', **{'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    @unittest.skipIf(serialization.brotli is None, 'brotli not installed')
+    def test_brotli_preferred_when_accepted(self):
+        response = self._get('/api/get_user_tasks?per_page=20', **{'Accept-Encoding': 'gzip, br'})
+        self.assertEqual(response.headers['Content-Encoding'], 'br')
+        self.assertEqual(len(json.loads(serialization.brotli.decompress(response.data))['tasks']), 20)
+
+    def test_fast_json_provider_round_trips(self):
+        with self.app.app_context():
+            payload = {'b': [1, 2.5, None], 'a': 'ü'}
+            self.assertEqual(self.app.json.loads(self.app.json.dumps(payload)), payload)
+
+    def test_fast_json_provider_matches_stdlib_on_edge_cases(self):
+        with self.app.test_request_context():
+            for payload in ({1: 'a'}, {'big': 2 ** 70}):
+                self.assertEqual(self.app.json.loads(self.app.json.dumps(payload)), json.loads(json.dumps(payload)))
+                response = self.app.json.response(payload)
+                self.assertEqual(json.loads(response.data), json.loads(json.dumps(payload)))
+
+    def test_fast_json_provider_parses_like_stdlib(self):
+        with self.app.app_context():
+            for body in ('{"id": %d}' % 2 ** 70, '[-%d]' % 2 ** 64, '{"x": NaN}'):
+                for data in (body, body.encode()):
+                    self.assertEqual(repr(self.app.json.loads(data)), repr(json.loads(body)))
+            with self.assertRaises(ValueError):
+                self.app.json.loads(b'{"x": ')
+
+
+if __name__ == '__main__':
+    unittest.main()